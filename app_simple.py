@@ -8,6 +8,7 @@ from pydantic import BaseModel
 from typing import List, Optional
 import json
 import random
+import re
 
 # Simple in-memory data storage
 movies_db = [
@@ -33,6 +34,19 @@ mood_genres = {
     "adventurous": ["Adventure", "Action"]
 }
 
+# Mood keywords, checked in priority order
+mood_keywords = {
+    "sad": ["sad", "depressed", "down"],
+    "angry": ["angry", "mad", "furious"],
+    "calm": ["calm", "peaceful", "relaxed"],
+    "energetic": ["energetic", "excited", "pumped"],
+    "romantic": ["romantic", "love", "passionate"],
+    "anxious": ["anxious", "worried", "nervous"],
+    "adventurous": ["adventurous", "exciting", "thrilling"]
+}
+word_to_mood = {word: mood for mood, words in mood_keywords.items() for word in words}
+mood_pattern = re.compile("|".join(map(re.escape, word_to_mood)))
+
 app = FastAPI(title="Simple Mood Movie Recommender", version="1.0.0")
 
 class MoodRequest(BaseModel):
@@ -75,21 +89,9 @@ async def get_recommendations(request: MoodRequest):
     if request.mood_category:
         mood = request.mood_category
     elif request.mood_text:
-        text = request.mood_text.lower()
-        if any(word in text for word in ["sad", "depressed", "down"]):
-            mood = "sad"
-        elif any(word in text for word in ["angry", "mad", "furious"]):
-            mood = "angry"
-        elif any(word in text for word in ["calm", "peaceful", "relaxed"]):
-            mood = "calm"
-        elif any(word in text for word in ["energetic", "excited", "pumped"]):
-            mood = "energetic"
-        elif any(word in text for word in ["romantic", "love", "passionate"]):
-            mood = "romantic"
-        elif any(word in text for word in ["anxious", "worried", "nervous"]):
-            mood = "anxious"
-        elif any(word in text for word in ["adventurous", "exciting", "thrilling"]):
-            mood = "adventurous"
+        # Single pass over the text, then pick the highest-priority mood found
+        found = {word_to_mood[word] for word in mood_pattern.findall(request.mood_text.lower())}
+        mood = next((m for m in mood_keywords if m in found), mood)
     
     # Get preferred genres for mood
     preferred_genres = mood_genres.get(mood, ["Drama", "Comedy"])
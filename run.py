@@ -20,11 +20,14 @@ def main():
     host = os.getenv("HOST", "0.0.0.0")
     port = int(os.getenv("PORT", 8000))
     debug = os.getenv("DEBUG", "True").lower() == "true"
+    # Auto-reload only supports a single worker process
+    workers = 1 if debug else int(os.getenv("WORKERS", os.cpu_count() or 1))
     
     print("🎬 Starting Mood Movie Recommender...")
     print(f"📍 Server will be available at: http://{host}:{port}")
     print(f"📚 API Documentation: http://{host}:{port}/docs")
     print(f"🔧 Debug mode: {'ON' if debug else 'OFF'}")
+    print(f"👷 Workers: {workers}")
     print("=" * 50)
     
     # Run the application
@@ -33,6 +36,9 @@ def main():
         host=host,
         port=port,
         reload=debug,
+        workers=workers,
+        loop="auto",  # uvloop when installed
+        http="auto",  # httptools when installed
         log_level="info" if not debug else "debug"
     )
 
@@ -1,13 +1,16 @@
 from datetime import datetime, timedelta
-from typing import Optional
+from collections import defaultdict, deque
+from typing import Deque, Dict, Optional
 from jose import JWTError, jwt
 from passlib.context import CryptContext
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.orm import Session
 from app.database import get_db
 from app.models import User
 import os
+import threading
+import time
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -17,15 +20,24 @@ SECRET_KEY = os.getenv("SECRET_KEY", "your-secret-key-change-in-production")
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Login/registration attempts allowed per client per minute. Counted per worker
+# process, so with several workers a client may get up to WORKERS times this
+AUTH_RATE_LIMIT = int(os.getenv("AUTH_RATE_LIMIT", 10))
+
+# bcrypt work factor (each +1 doubles hashing time)
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", 12))
+
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=BCRYPT_ROUNDS)
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify a password against its hash"""
     return pwd_context.verify(plain_password, hashed_password)
 
-def get_password_hash(password: str) -> str:
-    """Hash a password"""
+def get_password_hash(password: str, rounds: Optional[int] = None) -> str:
+    """Hash a password, optionally overriding the bcrypt work factor"""
+    if rounds is not None:
+        return pwd_context.handler("bcrypt").using(rounds=rounds).hash(password)
     return pwd_context.hash(password)
 
 def get_user_by_username(db: Session, username: str) -> Optional[User]:
@@ -40,11 +52,47 @@ def authenticate_user(db: Session, username: str, password: str) -> Optional[Use
     """Authenticate a user"""
     user = get_user_by_username(db, username)
     if not user:
+        # Spend the same hashing time as a real check so response timing
+        # does not reveal whether the user exists
+        pwd_context.dummy_verify()
         return None
     if not verify_password(password, user.hashed_password):
         return None
     return user
 
+class RateLimiter:
+    """Per-client sliding window rate limiter, used as a route dependency"""
+    
+    def __init__(self, max_requests: int, window_seconds: int = 60, max_clients: int = 10000):
+        self.max_requests = max_requests
+        self.window_seconds = window_seconds
+        self.max_clients = max_clients
+        self._hits: Dict[str, Deque[float]] = defaultdict(deque)
+        self._lock = threading.Lock()
+    
+    def __call__(self, request: Request):
+        client = request.client.host if request.client else "unknown"
+        now = time.monotonic()
+        with self._lock:
+            if len(self._hits) >= self.max_clients:
+                # Drop clients whose window has fully expired
+                self._hits = defaultdict(deque, {
+                    key: hits for key, hits in self._hits.items()
+                    if hits and now - hits[-1] < self.window_seconds
+                })
+            hits = self._hits[client]
+            while hits and now - hits[0] >= self.window_seconds:
+                hits.popleft()
+            if len(hits) >= self.max_requests:
+                raise HTTPException(
+                    status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                    detail="Too many requests, please try again later",
+                    headers={"Retry-After": str(self.window_seconds)},
+                )
+            hits.append(now)
+
+auth_rate_limiter = RateLimiter(AUTH_RATE_LIMIT)
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     """Create an access token"""
     to_encode = data.copy()
@@ -1,4 +1,5 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, exists, insert, select
+from sqlalchemy.exc import DBAPIError
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 import os
@@ -26,10 +27,44 @@ def get_db():
     finally:
         db.close()
 
+def _create_if_missing(schema_item):
+    """Create a table or index unless it already exists"""
+    try:
+        schema_item.create(bind=engine, checkfirst=True)
+    except DBAPIError:
+        # Another worker process may have created it between the check and the
+        # CREATE; checking again skips it then and re-raises any genuine error
+        schema_item.create(bind=engine, checkfirst=True)
+
 def init_db():
     """Initialize database tables"""
     from app.models import Base
-    Base.metadata.create_all(bind=engine)
+    
+    # Every worker process runs this at startup, so tolerate concurrent creation.
+    # Indexes are created separately too, since existing tables don't get new ones
+    for table in Base.metadata.sorted_tables:
+        _create_if_missing(table)
+        for index in table.indexes:
+            _create_if_missing(index)
+    
+    # Databases seeded before movie_mood_tags existed have an empty tag table
+    try:
+        _backfill_mood_tags()
+    except DBAPIError:
+        # Another worker process may be backfilling concurrently; once it has
+        # committed, the retry finds the table populated and does nothing
+        _backfill_mood_tags()
+
+def _backfill_mood_tags():
+    """Fill movie_mood_tags from Movie.mood_tags if the table is empty"""
+    from app.models import Movie, MovieMoodTag, mood_tag_rows
+    
+    with engine.begin() as conn:
+        if conn.execute(select(exists().where(MovieMoodTag.movie_id.isnot(None)))).scalar():
+            return
+        rows = mood_tag_rows(conn.execute(select(Movie.id, Movie.mood_tags)))
+        if rows:
+            conn.execute(insert(MovieMoodTag.__table__), rows)
 
 
 
@@ -2,27 +2,38 @@ from fastapi import FastAPI, Depends, HTTPException, status, Query
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from fastapi.responses import HTMLResponse
-from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+from sqlalchemy import select, func, insert
+from sqlalchemy.orm import Session, joinedload
 from typing import List, Optional
 import pandas as pd
+import asyncio
 import os
 
 from app.database import get_db, init_db
 from app.models import (
-    User, Movie, MoodEntry, Recommendation,
+    User, Movie, MovieMoodTag, MoodEntry, Recommendation,
     UserCreate, UserResponse, MovieResponse, 
     MoodAnalysisRequest, MoodAnalysisResponse,
     RecommendationRequest, RecommendationResponse,
-    MovieRatingRequest, Token
+    MovieRatingRequest, Token, MovieListAdapter, RecommendationListAdapter
 )
 from app.auth import (
     authenticate_user, create_access_token, get_current_active_user,
     get_password_hash, get_user_by_username, get_user_by_email,
-    ACCESS_TOKEN_EXPIRE_MINUTES
+    auth_rate_limiter, ACCESS_TOKEN_EXPIRE_MINUTES
 )
-from app.ml_engine import MLPipeline
+from app.ml_engine import MLPipeline, genre_tokens
 from datetime import timedelta
 
+# Load movies straight into Arrow-backed columns when pyarrow is available
+# (read_sql only accepts dtype_backend from pandas 2.0)
+try:
+    import pyarrow  # noqa: F401
+    READ_SQL_OPTIONS = {"dtype_backend": "pyarrow"} if int(pd.__version__.split('.')[0]) >= 2 else {}
+except ImportError:
+    READ_SQL_OPTIONS = {}
+
 # Initialize FastAPI app
 app = FastAPI(
     title="Mood Movie Recommender",
@@ -45,17 +56,34 @@ ml_pipeline = MLPipeline()
 # Initialize database
 init_db()
 
+# Cached movies table, keyed by a cheap (max id, count) version of the table
+_movies_cache = {"key": None, "df": None, "by_id": None}
+
+def get_movies_cache(db: Session) -> dict:
+    """Return the cached movies DataFrame, reloading it if the table changed"""
+    key = tuple(db.query(func.max(Movie.id), func.count(Movie.id)).one())
+    if _movies_cache["key"] != key:
+        stmt = select(
+            Movie.id, Movie.title, Movie.genre, Movie.year, Movie.director,
+            Movie.cast, Movie.plot, Movie.rating, Movie.mood_tags
+        )
+        movies_df = pd.read_sql(stmt, db.bind, **READ_SQL_OPTIONS)
+        records = movies_df.astype(object).where(movies_df.notna(), None).to_dict('records')
+        movies_by_id = {movie.id: movie for movie in MovieListAdapter.validate_python(records)}
+        # Parse genres once so recommendation filters are set-membership tests
+        movies_df['genre_tokens'] = genre_tokens(movies_df['genre'])
+        _movies_cache.update(key=key, df=movies_df, by_id=movies_by_id)
+    return _movies_cache
+
 # Mount static files
 app.mount("/static", StaticFiles(directory="static"), name="static")
 
-@app.get("/", response_class=HTMLResponse)
-async def read_root():
-    """Serve the main web interface"""
-    try:
-        with open("static/index.html", "r") as f:
-            return HTMLResponse(content=f.read())
-    except FileNotFoundError:
-        return HTMLResponse(content="""
+# Main web interface, read once at startup
+try:
+    with open("static/index.html", "r") as f:
+        INDEX_HTML = f.read()
+except FileNotFoundError:
+    INDEX_HTML = """
         <html>
             <head><title>Mood Movie Recommender</title></head>
             <body>
@@ -63,9 +91,14 @@ async def read_root():
                 <p>API is running! Visit <a href="/docs">/docs</a> for API documentation.</p>
             </body>
         </html>
-        """)
+        """
 
-@app.post("/register", response_model=UserResponse)
+@app.get("/", response_class=HTMLResponse)
+async def read_root():
+    """Serve the main web interface"""
+    return HTMLResponse(content=INDEX_HTML)
+
+@app.post("/register", response_model=UserResponse, dependencies=[Depends(auth_rate_limiter)])
 async def register_user(user: UserCreate, db: Session = Depends(get_db)):
     """Register a new user"""
     # Check if user already exists
@@ -82,7 +115,7 @@ async def register_user(user: UserCreate, db: Session = Depends(get_db)):
         )
     
     # Create new user
-    hashed_password = get_password_hash(user.password)
+    hashed_password = await run_in_threadpool(get_password_hash, user.password)
     db_user = User(
         username=user.username,
         email=user.email,
@@ -94,14 +127,15 @@ async def register_user(user: UserCreate, db: Session = Depends(get_db)):
     
     return db_user
 
-@app.post("/token", response_model=Token)
+@app.post("/token", response_model=Token, dependencies=[Depends(auth_rate_limiter)])
 async def login_for_access_token(
     username: str = Query(...),
     password: str = Query(...),
     db: Session = Depends(get_db)
 ):
     """Login and get access token"""
-    user = authenticate_user(db, username, password)
+    # Password hashing is deliberately slow; keep it off the event loop
+    user = await run_in_threadpool(authenticate_user, db, username, password)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -126,7 +160,9 @@ async def analyze_mood(
     db: Session = Depends(get_db)
 ):
     """Analyze mood from text input"""
-    mood_analysis = ml_pipeline.mood_analyzer.analyze_mood(request.mood_text)
+    mood_analysis = await run_in_threadpool(
+        ml_pipeline.mood_analyzer.analyze_mood, request.mood_text
+    )
     
     # Save mood entry to database
     mood_entry = MoodEntry(
@@ -144,52 +180,35 @@ async def analyze_mood(
         mood_breakdown=mood_analysis['mood_breakdown']
     )
 
-@app.post("/recommendations", response_model=List[RecommendationResponse])
-async def get_recommendations(
-    request: RecommendationRequest,
-    current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
-):
-    """Get movie recommendations based on mood"""
-    
-    # Get movies from database
-    movies = db.query(Movie).all()
-    if not movies:
+# Maximum number of requests accepted by /recommendations/batch
+MAX_BATCH_SIZE = 64
+
+def _load_movies(db: Session) -> dict:
+    """Get the cached movies, raising 404 if the table is empty"""
+    movies_cache = get_movies_cache(db)
+    if movies_cache["df"].empty:
         raise HTTPException(
             status_code=404,
             detail="No movies found in database"
         )
-    
-    # Convert to DataFrame for ML processing
-    movies_data = []
-    for movie in movies:
-        movies_data.append({
-            'id': movie.id,
-            'title': movie.title,
-            'genre': movie.genre,
-            'year': movie.year,
-            'director': movie.director,
-            'cast': movie.cast,
-            'plot': movie.plot,
-            'rating': movie.rating,
-            'mood_tags': movie.mood_tags
-        })
-    
-    movies_df = pd.DataFrame(movies_data)
-    
-    # Get user preferences (simplified for now)
-    user_preferences = {
+    return movies_cache
+
+def _get_user_preferences(user: User) -> dict:
+    """Get user preferences (simplified for now)"""
+    return {
         'preferred_genres': ['drama', 'comedy', 'action']  # Could be learned from user history
     }
-    
-    # Process recommendation request
+
+def _recommend(request: RecommendationRequest, movies_df: pd.DataFrame,
+               user_preferences: dict) -> List[dict]:
+    """Run the ML pipeline for a single recommendation request"""
     if request.mood_text:
         result = ml_pipeline.process_recommendation_request(
             request.mood_text, movies_df, user_preferences, request.limit
         )
-        recommendations = result['recommendations']
+        return result['recommendations']
     elif request.mood_category:
-        recommendations = ml_pipeline.recommendation_engine.get_mood_based_recommendations(
+        return ml_pipeline.recommendation_engine.get_mood_based_recommendations(
             movies_df, request.mood_category, user_preferences, request.limit
         )
     else:
@@ -197,34 +216,83 @@ async def get_recommendations(
             status_code=400,
             detail="Either mood_text or mood_category must be provided"
         )
+
+def _save_recommendations(db: Session, user_id: int, recommendations: List[dict]):
+    """Save recommendations to database in a single bulk insert"""
+    if recommendations:
+        # Core executemany insert, skipping ORM object construction entirely
+        db.execute(insert(Recommendation), [
+            {
+                'user_id': user_id,
+                'movie_id': int(rec['movie_id']),
+                'recommendation_score': float(rec['recommendation_score']),
+                'mood_context': rec['mood_context']
+            }
+            for rec in recommendations
+        ])
+    db.commit()
+
+def _format_recommendations(recommendations: List[dict],
+                            movies_by_id: dict) -> List[RecommendationResponse]:
+    """Build API responses for recommendations"""
+    return RecommendationListAdapter.validate_python([
+        {
+            'movie': movies_by_id[rec['movie_id']],
+            'recommendation_score': rec['recommendation_score'],
+            'mood_context': rec['mood_context'],
+            'reason': rec['reason']
+        }
+        for rec in recommendations if rec['movie_id'] in movies_by_id
+    ])
+
+@app.post("/recommendations", response_model=List[RecommendationResponse])
+async def get_recommendations(
+    request: RecommendationRequest,
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """Get movie recommendations based on mood"""
+    movies_cache = _load_movies(db)
     
-    # Save recommendations to database
-    recommendation_objects = []
-    for rec in recommendations:
-        recommendation = Recommendation(
-            user_id=current_user.id,
-            movie_id=rec['movie_id'],
-            recommendation_score=rec['recommendation_score'],
-            mood_context=rec['mood_context']
+    # Run the CPU-bound ML pipeline off the event loop
+    recommendations = await run_in_threadpool(
+        _recommend, request, movies_cache["df"], _get_user_preferences(current_user)
+    )
+    
+    _save_recommendations(db, current_user.id, recommendations)
+    
+    return _format_recommendations(recommendations, movies_cache["by_id"])
+
+@app.post("/recommendations/batch", response_model=List[List[RecommendationResponse]])
+async def get_batch_recommendations(
+    requests: List[RecommendationRequest],
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """Get movie recommendations for several moods in one call"""
+    if len(requests) > MAX_BATCH_SIZE:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Batch size cannot exceed {MAX_BATCH_SIZE} requests"
         )
-        db.add(recommendation)
-        recommendation_objects.append(recommendation)
     
-    db.commit()
+    # Load movies and preferences once for the whole batch
+    movies_cache = _load_movies(db)
+    user_preferences = _get_user_preferences(current_user)
     
-    # Return formatted recommendations
-    response_recommendations = []
-    for rec in recommendations:
-        movie = next((m for m in movies if m.id == rec['movie_id']), None)
-        if movie:
-            response_recommendations.append(RecommendationResponse(
-                movie=MovieResponse.from_orm(movie),
-                recommendation_score=rec['recommendation_score'],
-                mood_context=rec['mood_context'],
-                reason=rec['reason']
-            ))
+    results = await asyncio.gather(*(
+        run_in_threadpool(_recommend, request, movies_cache["df"], user_preferences)
+        for request in requests
+    ))
     
-    return response_recommendations
+    _save_recommendations(
+        db, current_user.id, [rec for recommendations in results for rec in recommendations]
+    )
+    
+    return [
+        _format_recommendations(recommendations, movies_cache["by_id"])
+        for recommendations in results
+    ]
 
 @app.post("/rate-movie")
 async def rate_movie(
@@ -256,10 +324,16 @@ async def rate_movie(
 async def get_movies(
     skip: int = 0,
     limit: int = 100,
+    mood_tag: Optional[str] = None,
     db: Session = Depends(get_db)
 ):
-    """Get list of movies"""
-    movies = db.query(Movie).offset(skip).limit(limit).all()
+    """Get list of movies, optionally only those tagged with a mood"""
+    query = db.query(Movie)
+    if mood_tag:
+        # Membership test against the indexed movie_mood_tags table
+        tagged_ids = select(MovieMoodTag.movie_id).where(MovieMoodTag.tag == mood_tag.strip().lower())
+        query = query.filter(Movie.id.in_(tagged_ids))
+    movies = query.offset(skip).limit(limit).all()
     return movies
 
 @app.get("/movies/{movie_id}", response_model=MovieResponse)
@@ -276,22 +350,22 @@ async def get_my_recommendations(
     db: Session = Depends(get_db)
 ):
     """Get user's recommendation history"""
-    recommendations = db.query(Recommendation).filter(
+    recommendations = db.query(Recommendation).options(
+        joinedload(Recommendation.movie)
+    ).filter(
         Recommendation.user_id == current_user.id
     ).order_by(Recommendation.created_at.desc()).limit(50).all()
     
-    response_recommendations = []
-    for rec in recommendations:
-        movie = db.query(Movie).filter(Movie.id == rec.movie_id).first()
-        if movie:
-            response_recommendations.append(RecommendationResponse(
-                movie=MovieResponse.from_orm(movie),
-                recommendation_score=rec.recommendation_score,
-                mood_context=rec.mood_context,
-                reason=f"Previously recommended for {rec.mood_context} mood"
-            ))
-    
-    return response_recommendations
+    # Validate the whole history (movies included) in one batched call
+    return RecommendationListAdapter.validate_python([
+        {
+            'movie': rec.movie,
+            'recommendation_score': rec.recommendation_score,
+            'mood_context': rec.mood_context,
+            'reason': f"Previously recommended for {rec.mood_context} mood"
+        }
+        for rec in recommendations if rec.movie
+    ], from_attributes=True)
 
 @app.get("/health")
 async def health_check():
@@ -1,13 +1,15 @@
 import numpy as np
 import pandas as pd
 from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
+from sklearn.metrics.pairwise import linear_kernel
 from sklearn.cluster import KMeans
 from textblob import TextBlob
 import nltk
 from nltk.sentiment import SentimentIntensityAnalyzer
 import re
 import json
+from collections import Counter
+from functools import lru_cache
 from typing import Dict, List, Tuple, Optional
 import logging
 
@@ -24,11 +26,38 @@ except LookupError:
 
 logger = logging.getLogger(__name__)
 
+# Characters stripped from text before mood analysis
+_CLEAN_RE = re.compile(r'[^a-z\s]+')
+
+# Random generator for the score tie-breaking noise
+_RNG = np.random.default_rng()
+
+# Separators between genres in a movie's genre string
+_GENRE_SPLIT_RE = re.compile(r'[\s,/|]+')
+
+# Number of distinct cleaned texts whose mood analysis is cached
+MOOD_CACHE_SIZE = 4096
+
+def top_k_indices(scores: np.ndarray, k: int) -> np.ndarray:
+    """Return indices of the k highest scores, best first, without a full sort"""
+    k = min(k, len(scores))
+    if k <= 0:
+        return np.empty(0, dtype=np.intp)
+    top = np.argpartition(-scores, k - 1)[:k]
+    return top[np.argsort(-scores[top], kind='stable')]
+
+def genre_tokens(genres: pd.Series) -> pd.Series:
+    """Parse genre strings into frozensets of lowercase genre tokens"""
+    return genres.fillna('').str.lower().map(
+        lambda genre: frozenset(token for token in _GENRE_SPLIT_RE.split(genre) if token)
+    )
+
 class MoodAnalyzer:
     """Analyzes text to detect mood and emotional state"""
     
     def __init__(self):
-        self.sia = SentimentIntensityAnalyzer()
+        # VADER loads its lexicon on construction, so it is created on first use
+        self._sia: Optional[SentimentIntensityAnalyzer] = None
         self.mood_keywords = {
             'happy': ['happy', 'joy', 'excited', 'cheerful', 'elated', 'thrilled', 'ecstatic', 'blissful'],
             'sad': ['sad', 'depressed', 'melancholy', 'gloomy', 'down', 'blue', 'miserable', 'heartbroken'],
@@ -39,6 +68,23 @@ class MoodAnalyzer:
             'romantic': ['romantic', 'love', 'passionate', 'intimate', 'sweet', 'tender', 'affectionate'],
             'adventurous': ['adventurous', 'exciting', 'thrilling', 'daring', 'bold', 'wild', 'epic']
         }
+        
+        # Inverted keyword -> moods index so text is scanned in a single pass
+        word_to_moods = {}
+        for mood, keywords in self.mood_keywords.items():
+            for keyword in keywords:
+                word_to_moods.setdefault(keyword, []).append(mood)
+        self._word_to_moods = {word: tuple(moods) for word, moods in word_to_moods.items()}
+        
+        # In-process cache of analysis results keyed by cleaned text
+        self._analyze_clean_text = lru_cache(maxsize=MOOD_CACHE_SIZE)(self._analyze_clean_text)
+    
+    @property
+    def sia(self) -> SentimentIntensityAnalyzer:
+        """Sentiment analyzer, initialized lazily"""
+        if self._sia is None:
+            self._sia = SentimentIntensityAnalyzer()
+        return self._sia
     
     def analyze_mood(self, text: str) -> Dict:
         """Analyze mood from text input"""
@@ -49,14 +95,22 @@ class MoodAnalyzer:
                 'mood_breakdown': {}
             }
         
-        # Clean text
-        text = self._clean_text(text)
+        # Clean and tokenize text
+        words = self._clean_text(text)
+        
+        # Analysis is deterministic, so identical cleaned texts hit the cache
+        result = self._analyze_clean_text(' '.join(words))
+        return dict(result, mood_breakdown=dict(result['mood_breakdown']))
+    
+    def _analyze_clean_text(self, text: str) -> Dict:
+        """Analyze mood from cleaned text (memoized per instance)"""
+        words = text.split()
         
         # Get sentiment scores
         sentiment_scores = self.sia.polarity_scores(text)
         
         # Analyze mood keywords
-        mood_scores = self._analyze_mood_keywords(text)
+        mood_scores = self._analyze_mood_keywords(words)
         
         # Combine sentiment and mood analysis
         combined_scores = self._combine_scores(sentiment_scores, mood_scores)
@@ -71,29 +125,27 @@ class MoodAnalyzer:
             'mood_breakdown': combined_scores
         }
     
-    def _clean_text(self, text: str) -> str:
-        """Clean and preprocess text"""
-        # Convert to lowercase
-        text = text.lower()
-        # Remove special characters but keep spaces
-        text = re.sub(r'[^a-zA-Z\s]', '', text)
-        # Remove extra whitespace
-        text = ' '.join(text.split())
-        return text
+    def _clean_text(self, text: str) -> List[str]:
+        """Clean and tokenize text"""
+        # Lowercase, remove special characters and split on whitespace
+        return _CLEAN_RE.sub('', text.lower()).split()
     
-    def _analyze_mood_keywords(self, text: str) -> Dict[str, float]:
+    def _analyze_mood_keywords(self, words: List[str]) -> Dict[str, float]:
         """Analyze mood based on keyword presence"""
         mood_scores = {mood: 0.0 for mood in self.mood_keywords.keys()}
         
-        words = text.split()
         total_words = len(words)
         
         if total_words == 0:
             return mood_scores
         
-        for mood, keywords in self.mood_keywords.items():
-            keyword_count = sum(1 for word in words if word in keywords)
-            mood_scores[mood] = keyword_count / total_words
+        # Count each distinct word once (Counter tallies in C), then fan out to its moods
+        for word, count in Counter(words).items():
+            for mood in self._word_to_moods.get(word, ()):
+                mood_scores[mood] += count
+        
+        for mood in mood_scores:
+            mood_scores[mood] /= total_words
         
         return mood_scores
     
@@ -134,6 +186,10 @@ class MovieRecommendationEngine:
     
     def __init__(self):
         self.vectorizer = TfidfVectorizer(max_features=1000, stop_words='english')
+        # Fitted TF-IDF features, reused while the same movies DataFrame is passed in
+        self._feat_cache: Dict = {}
+        # Positional indices of movies matching each genre set, per movies DataFrame
+        self._genre_index_cache: Dict = {}
         self.mood_movie_mapping = {
             'happy': ['comedy', 'family', 'musical', 'animation'],
             'sad': ['drama', 'romance', 'biography'],
@@ -157,19 +213,21 @@ class MovieRecommendationEngine:
         # Filter movies by mood-appropriate genres
         preferred_genres = self.mood_movie_mapping.get(mood, ['drama', 'comedy'])
         
-        # Create genre filter
-        genre_filter = movies_df['genre'].str.lower().str.contains('|'.join(preferred_genres), na=False)
-        mood_movies = movies_df[genre_filter].copy()
+        # Apply the (memoized) genre filter
+        mood_movies = movies_df.iloc[self._get_genre_indices(movies_df, preferred_genres)]
         
         if mood_movies.empty:
             # Fallback to all movies if no mood-specific movies found
-            mood_movies = movies_df.copy()
+            mood_movies = movies_df
         
-        # Calculate recommendation scores
-        recommendations = []
+        # Calculate recommendation scores for all candidates at once
+        scores = self._calculate_movie_scores(mood_movies, mood, user_preferences)
+        
+        # Select the top results without sorting every candidate
+        top_idx = top_k_indices(scores, limit)
         
-        for _, movie in mood_movies.iterrows():
-            score = self._calculate_movie_score(movie, mood, user_preferences)
+        recommendations = []
+        for movie, score in zip(mood_movies.iloc[top_idx].to_dict('records'), scores[top_idx]):
             recommendations.append({
                 'movie_id': movie['id'],
                 'title': movie['title'],
@@ -182,47 +240,67 @@ class MovieRecommendationEngine:
                 'reason': f"Recommended for {mood} mood based on {movie['genre']} genre"
             })
         
-        # Sort by recommendation score and return top results
-        recommendations.sort(key=lambda x: x['recommendation_score'], reverse=True)
-        return recommendations[:limit]
+        return recommendations
+    
+    def _get_genre_indices(self, movies_df: pd.DataFrame, genres: List[str]) -> np.ndarray:
+        """Get positional indices of movies having any of the given genres, memoized per DataFrame"""
+        cache = self._genre_index_cache
+        if cache.get('df') is not movies_df:
+            cache = {'df': movies_df, 'indices': {}}
+            self._genre_index_cache = cache
+        
+        key = tuple(genres)
+        if key not in cache['indices']:
+            genre_filter = self._genre_match(self._movie_genre_tokens(movies_df), genres)
+            cache['indices'][key] = np.flatnonzero(genre_filter)
+        return cache['indices'][key]
     
-    def _calculate_movie_score(self, movie: pd.Series, mood: str, 
-                             user_preferences: Optional[Dict] = None) -> float:
-        """Calculate recommendation score for a movie"""
+    @staticmethod
+    def _movie_genre_tokens(movies_df: pd.DataFrame) -> pd.Series:
+        """Get genre token sets, using the precomputed 'genre_tokens' column if present"""
+        if 'genre_tokens' in movies_df:
+            return movies_df['genre_tokens']
+        return genre_tokens(movies_df['genre'])
+    
+    @staticmethod
+    def _genre_match(movie_genres: pd.Series, genres: List[str]) -> np.ndarray:
+        """Return a boolean mask of movies having any of the given genres"""
+        genres = frozenset(genres)
+        return np.fromiter(
+            (not tokens.isdisjoint(genres) for tokens in movie_genres),
+            dtype=bool, count=len(movie_genres)
+        )
+    
+    def _calculate_movie_scores(self, movies: pd.DataFrame, mood: str, 
+                                user_preferences: Optional[Dict] = None) -> np.ndarray:
+        """Calculate recommendation scores for a DataFrame of movies"""
         base_score = 0.5
+        movie_genres = self._movie_genre_tokens(movies)
         
         # Genre-mood alignment score
         preferred_genres = self.mood_movie_mapping.get(mood, [])
-        movie_genre = movie['genre'].lower()
-        
-        genre_score = 0.0
-        for genre in preferred_genres:
-            if genre in movie_genre:
-                genre_score = 0.4
-                break
+        genre_score = np.where(self._genre_match(movie_genres, preferred_genres), 0.4, 0.0)
         
         # Rating score (if available)
-        rating_score = 0.0
-        if pd.notna(movie.get('rating')) and movie['rating'] > 0:
-            rating_score = (movie['rating'] / 10.0) * 0.3
+        if 'rating' in movies:
+            ratings = movies['rating'].fillna(0).to_numpy(dtype=float)
+        else:
+            ratings = np.zeros(len(movies))
+        rating_score = np.where(ratings > 0, ratings / 10.0 * 0.3, 0.0)
         
         # User preference score (if available)
-        preference_score = 0.0
-        if user_preferences:
-            # Check if user has rated similar movies highly
-            if 'preferred_genres' in user_preferences:
-                for pref_genre in user_preferences['preferred_genres']:
-                    if pref_genre.lower() in movie_genre:
-                        preference_score = 0.2
-                        break
+        preference_score = np.zeros(len(movies))
+        if user_preferences and 'preferred_genres' in user_preferences:
+            pref_genres = [genre.lower() for genre in user_preferences['preferred_genres']]
+            preference_score = np.where(self._genre_match(movie_genres, pref_genres), 0.2, 0.0)
         
         # Combine scores
         total_score = base_score + genre_score + rating_score + preference_score
         
         # Add some randomness to avoid identical scores
-        total_score += np.random.normal(0, 0.05)
+        total_score += _RNG.standard_normal(len(movies)) * 0.05
         
-        return min(max(total_score, 0.0), 1.0)
+        return np.clip(total_score, 0.0, 1.0)
     
     def get_similar_movies(self, movies_df: pd.DataFrame, movie_id: int, limit: int = 5) -> List[Dict]:
         """Get movies similar to a given movie using content-based filtering"""
@@ -237,33 +315,25 @@ class MovieRecommendationEngine:
         
         target_movie = target_movie.iloc[0]
         
-        # Create feature vectors for movies
-        movie_features = []
-        movie_ids = []
-        
-        for _, movie in movies_df.iterrows():
-            # Combine title, genre, and plot for feature vector
-            features = f"{movie['title']} {movie['genre']} {movie.get('plot', '')}"
-            movie_features.append(features)
-            movie_ids.append(movie['id'])
-        
         # Vectorize movie features
         try:
-            feature_matrix = self.vectorizer.fit_transform(movie_features)
+            feature_matrix, id_to_index = self._get_feature_matrix(movies_df)
             
             # Find target movie index
-            target_idx = movie_ids.index(movie_id)
+            target_idx = id_to_index[movie_id]
             
-            # Calculate similarities
-            similarities = cosine_similarity(feature_matrix[target_idx:target_idx+1], feature_matrix).flatten()
+            # Calculate similarities (TF-IDF rows are L2-normalized, so the
+            # linear kernel equals cosine similarity)
+            similarities = linear_kernel(feature_matrix[target_idx], feature_matrix).flatten()
             
             # Get top similar movies (excluding the target movie itself)
-            similar_indices = np.argsort(similarities)[::-1][1:limit+1]
+            similarities[target_idx] = -1.0
+            similar_indices = top_k_indices(similarities, min(limit, len(similarities) - 1))
             
             similar_movies = []
             for idx in similar_indices:
                 if similarities[idx] > 0.1:  # Only include movies with meaningful similarity
-                    movie = movies_df[movies_df['id'] == movie_ids[idx]].iloc[0]
+                    movie = movies_df.iloc[idx]
                     similar_movies.append({
                         'movie_id': movie['id'],
                         'title': movie['title'],
@@ -280,6 +350,20 @@ class MovieRecommendationEngine:
         except Exception as e:
             logger.error(f"Error in get_similar_movies: {e}")
             return []
+    
+    def _get_feature_matrix(self, movies_df: pd.DataFrame) -> Tuple:
+        """Get the TF-IDF feature matrix and movie id -> row index map, fitting once per DataFrame"""
+        if self._feat_cache.get('df') is not movies_df:
+            # Combine title, genre, and plot for feature vector
+            plots = movies_df['plot'].fillna('') if 'plot' in movies_df else ''
+            movie_features = (
+                movies_df['title'].astype(str) + ' ' + movies_df['genre'].astype(str) + ' ' + plots
+            )
+            feature_matrix = self.vectorizer.fit_transform(movie_features)
+            id_to_index = {movie_id: idx for idx, movie_id in enumerate(movies_df['id'])}
+            self._feat_cache = {'df': movies_df, 'matrix': feature_matrix, 'index': id_to_index}
+        
+        return self._feat_cache['matrix'], self._feat_cache['index']
 
 class MLPipeline:
     """Main ML pipeline that combines mood analysis and recommendation"""
@@ -1,9 +1,9 @@
-from sqlalchemy import Column, Integer, String, Float, Text, DateTime, Boolean, ForeignKey
+from sqlalchemy import Column, Integer, SmallInteger, Numeric, String, Text, DateTime, Boolean, ForeignKey, Index
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 from datetime import datetime
-from pydantic import BaseModel
-from typing import List, Optional
+from pydantic import BaseModel, ConfigDict, TypeAdapter
+from typing import Dict, Iterable, List, Optional, Tuple
 
 Base = declarative_base()
 
@@ -24,20 +24,51 @@ class User(Base):
 
 class Movie(Base):
     __tablename__ = "movies"
+    __table_args__ = (
+        # Genre filters ordered by rating, and year lookups
+        Index("ix_movie_genre_rating", "genre", "rating"),
+        Index("ix_movie_year", "year"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String(200), nullable=False, index=True)
     genre = Column(String(100), nullable=False)
-    year = Column(Integer, nullable=False)
+    year = Column(SmallInteger, nullable=False)
     director = Column(String(100), nullable=False)
     cast = Column(Text, nullable=True)
     plot = Column(Text, nullable=True)
-    rating = Column(Float, nullable=True)
+    rating = Column(Numeric(3, 1, asdecimal=False), nullable=True)  # 0.0-10.0
     mood_tags = Column(Text, nullable=True)  # JSON string of mood associations
     created_at = Column(DateTime, default=datetime.utcnow)
     
     # Relationships
     recommendations = relationship("Recommendation", back_populates="movie")
+    mood_tag_entries = relationship("MovieMoodTag", back_populates="movie")
+
+class MovieMoodTag(Base):
+    """Normalized mood tags, one row per (movie, tag), indexed for lookup by tag"""
+    __tablename__ = "movie_mood_tags"
+    __table_args__ = (
+        Index("ix_movie_mood_tags_tag_movie", "tag", "movie_id"),
+    )
+    
+    movie_id = Column(Integer, ForeignKey("movies.id"), primary_key=True)
+    tag = Column(String(32), primary_key=True)
+    
+    # Relationships
+    movie = relationship("Movie", back_populates="mood_tag_entries")
+
+def parse_mood_tags(mood_tags: Optional[str]) -> List[str]:
+    """Split a comma-separated mood tag string into normalized tags"""
+    return [tag.strip().lower() for tag in (mood_tags or "").split(",") if tag.strip()]
+
+def mood_tag_rows(movies: Iterable[Tuple[int, Optional[str]]]) -> List[Dict]:
+    """Build movie_mood_tags rows from (movie id, mood_tags string) pairs"""
+    return [
+        {"movie_id": movie_id, "tag": tag}
+        for movie_id, mood_tags in movies
+        for tag in dict.fromkeys(parse_mood_tags(mood_tags))
+    ]
 
 class MoodEntry(Base):
     __tablename__ = "mood_entries"
@@ -46,7 +77,7 @@ class MoodEntry(Base):
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     mood_text = Column(Text, nullable=False)
     detected_mood = Column(String(50), nullable=False)
-    confidence_score = Column(Float, nullable=False)
+    confidence_score = Column(Numeric(4, 3, asdecimal=False), nullable=False)  # 0.000-1.000
     created_at = Column(DateTime, default=datetime.utcnow)
     
     # Relationships
@@ -54,11 +85,16 @@ class MoodEntry(Base):
 
 class Recommendation(Base):
     __tablename__ = "recommendations"
+    __table_args__ = (
+        # Lookups by user and movie (/rate-movie) and per-user history (/my-recommendations)
+        Index("ix_rec_user_movie", "user_id", "movie_id"),
+        Index("ix_rec_user_created", "user_id", "created_at"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     movie_id = Column(Integer, ForeignKey("movies.id"), nullable=False)
-    recommendation_score = Column(Float, nullable=False)
+    recommendation_score = Column(Numeric(4, 3, asdecimal=False), nullable=False)  # 0.000-1.000
     mood_context = Column(String(50), nullable=False)
     created_at = Column(DateTime, default=datetime.utcnow)
     is_viewed = Column(Boolean, default=False)
@@ -80,8 +116,7 @@ class UserResponse(BaseModel):
     email: str
     created_at: datetime
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 class MovieResponse(BaseModel):
     id: int
@@ -94,8 +129,7 @@ class MovieResponse(BaseModel):
     rating: Optional[float] = None
     mood_tags: Optional[str] = None
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 class MoodAnalysisRequest(BaseModel):
     mood_text: str
@@ -124,6 +158,6 @@ class Token(BaseModel):
     access_token: str
     token_type: str
 
-
-
-
+# Batched validators for lists of API models
+MovieListAdapter = TypeAdapter(List[MovieResponse])
+RecommendationListAdapter = TypeAdapter(List[RecommendationResponse])